@@ -1,13 +1,15 @@
-from flask import Flask, request, jsonify
+import atexit
+from flask import Flask, request, Response
 from flask_restful import Api, Resource
 import logging
 import numpy as np
 import pyaudio
 from silero_vad import load_silero_vad, get_speech_timestamps
+import threading
 import time
 import torch
 from typing import Optional
-from utils import encode_audio_to_base64, HealthCheckAPI
+from utils import encode_audio_to_wav, HealthCheckAPI
 
 
 
@@ -35,6 +37,225 @@ logger = logging.getLogger(__name__)
 silero_model = load_silero_vad()
 
 
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer ring buffer for raw PCM bytes.
+
+    The PyAudio callback thread is the only writer and the VAD loop is
+    the only reader. Each side owns one of the two counters, so no lock
+    is needed: the writer only advances `_head`, the reader only
+    advances `_tail`.
+    """
+    def __init__(self, capacity : int) -> None:
+        """
+        Parameters
+        ----------
+        capacity : int
+            Minimum number of bytes to hold. Rounded up to a power of
+            two so positions wrap with a bitmask.
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+
+        self._size = size
+        self._mask = size - 1
+        self._view = memoryview(bytearray(size))
+
+        # Total bytes ever written / read.
+        self._head = 0
+        self._tail = 0
+
+        # Set by the writer whenever new data lands.
+        self._data_ready = threading.Event()
+
+        # Number of blocks dropped because the reader fell behind.
+        self.overflows = 0
+
+    def write(self, data : bytes) -> None:
+        """
+        Copy `data` into the ring. Called from the PyAudio callback.
+        """
+        n = len(data)
+        if n > self._size - (self._head - self._tail):
+            # Never overwrite audio the reader hasn't consumed yet.
+            self.overflows += 1
+            return
+
+        src = memoryview(data)
+        start = self._head & self._mask
+        first = min(n, self._size - start)
+        self._view[start:start + first] = src[:first]
+        if first < n:
+            self._view[:n - first] = src[first:]
+
+        self._head += n
+        self._data_ready.set()
+
+    def read_into(
+        self,
+        dest : memoryview,
+        timeout : float,
+        cancel : Optional[threading.Event] = None) -> bool:
+        """
+        Fill `dest` completely with the oldest unread bytes.
+
+        Parameters
+        ----------
+        dest : memoryview
+            Writable byte view to copy into.
+        timeout : float
+            Seconds to wait for each new block before giving up.
+        cancel : Optional[threading.Event]
+            If given and set, stop waiting (see `wake`).
+
+        Returns
+        -------
+        bool
+            True if `dest` was filled, False on timeout or cancel.
+        """
+        n = len(dest)
+        while self._head - self._tail < n:
+            # Clear before re-checking so a write can't slip in unseen.
+            self._data_ready.clear()
+            if self._head - self._tail >= n:
+                break
+            if cancel is not None and cancel.is_set():
+                return False
+            if not self._data_ready.wait(timeout):
+                return False
+
+        start = self._tail & self._mask
+        first = min(n, self._size - start)
+        dest[:first] = self._view[start:start + first]
+        if first < n:
+            dest[first:] = self._view[:n - first]
+
+        self._tail += n
+        return True
+
+    def wake(self) -> None:
+        """
+        Wakes a reader blocked in `read_into`, so it re-checks `cancel`.
+        """
+        self._data_ready.set()
+
+    def clear(self) -> None:
+        """
+        Discards all unread bytes. Only call while the writer is stopped.
+        """
+        self._tail = self._head
+        self.overflows = 0
+
+
+# Mic capture settings.
+SAMPLE_RATE = 16000
+CHUNK_SIZE = 1024
+
+# Frames per PortAudio callback. Larger than CHUNK_SIZE so ALSA wakes up
+# 4x less often on the Pi; the ring buffer decouples it from VAD windows.
+STREAM_BUFFER_FRAMES = CHUNK_SIZE * 4
+
+# Seconds of speech in a 1s VAD window needed to start recording, and the
+# lower amount that keeps a started recording going (hysteresis). Starting
+# takes more speech than the old single 0.5s threshold, so short bursts of
+# noise don't open a recording; once started, pauses between words
+# (windows with less speech) don't cut it off.
+SPEECH_START_THRESHOLD = 0.6
+SPEECH_CONTINUE_THRESHOLD = 0.25
+
+# Windows whose RMS level (in int16 units) is below this are treated as
+# silence without running Silero. Kept low so quiet callers still pass;
+# set to 0 to always run the model.
+SILENCE_RMS_FLOOR = 100
+
+# The input stream is opened on first use and then only stopped/started
+# between recordings, so PortAudio doesn't re-probe the ALSA device on
+# every request. Capture runs on PortAudio's thread and only fills the
+# ring, so a slow VAD pass or GC pause can't make the device drop frames.
+_input_ring = AudioRingBuffer(capacity=SAMPLE_RATE * 2 * 4)
+_input_stream = None
+_input_lock = threading.Lock()
+
+# Set by a new recording request to cancel the one holding the stream.
+# The older request's client has almost always given up on it (the
+# chatbot abandons a pending VAD call when the phone is hung up), so the
+# newest request wins instead of queueing behind a recording nobody reads.
+_cancel_recording = threading.Event()
+
+
+def _capture_callback(in_data, frame_count, time_info, status):
+    _input_ring.write(in_data)
+    return (None, pyaudio.paContinue)
+
+
+def _start_input_stream() -> None:
+    """
+    Starts the shared input stream, opening it on first use.
+    If another recording is using it, cancels that one and waits for it
+    to let go of the stream.
+    """
+    global _input_stream
+
+    while not _input_lock.acquire(timeout=0.1):
+        if not _cancel_recording.is_set():
+            logging.info("Cancelling the recording in progress for a new request.")
+        _cancel_recording.set()
+        _input_ring.wake()
+    _cancel_recording.clear()
+
+    try:
+        if _input_stream is None:
+            _input_stream = pa.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=SAMPLE_RATE,
+                input=True,
+                frames_per_buffer=STREAM_BUFFER_FRAMES,
+                stream_callback=_capture_callback,
+                start=False)
+
+        # Drop anything left over from the previous recording.
+        _input_ring.clear()
+        _input_stream.start_stream()
+
+    except Exception:
+        _input_lock.release()
+        raise
+
+
+def _stop_input_stream() -> None:
+    """
+    Stops (but keeps open) the shared input stream.
+    """
+    try:
+        if _input_stream is not None:
+            _input_stream.stop_stream()
+    finally:
+        _input_lock.release()
+
+
+def _close_audio() -> None:
+    """
+    Closes the shared input stream and shuts down PortAudio at exit.
+    """
+    global _input_stream
+
+    if _input_stream is not None:
+        try:
+            _input_stream.close()
+        except Exception as e:
+            logging.warning(f"Stream close error: {e}")
+        _input_stream = None
+
+    pa.terminate()
+
+
+# Registered at import, so PortAudio is released however the server exits
+# (including Ctrl-C, which never returns from `app.run`).
+atexit.register(_close_audio)
+
+
 def record_audio_with_silero_vad(
     silence_duration_to_stop: float,
     min_recording_duration: float,
@@ -66,72 +287,137 @@ def record_audio_with_silero_vad(
         if no speech detected or recording too short
     """
     buffer_duration = 1.0
-    sample_rate = 16000
-    chunk_size = 1024
-
-    # Open audio stream.
-    stream = pa.open(
-        format=pyaudio.paInt16,
-        channels=1,
-        rate=sample_rate,
-        input=True,
-        frames_per_buffer=chunk_size)
-    
-    start_time = time.time()
-    max_no_speech_duration = max_recording_duration + 1
+    sample_rate = SAMPLE_RATE
+    chunk_size = CHUNK_SIZE
+    chunk_bytes = chunk_size * 2
+    ring = _input_ring
 
-    # Raw int16 numpy arrays waiting for VAD check.
-    audio_buffer = []
+    max_no_speech_duration = max_recording_duration + 1
 
-    # Frames after speech started.
-    recorded_frames = []
+    # Fixed-size window of raw int16 audio waiting for VAD check: a whole
+    # number of chunks covering at least `buffer_duration`. Preallocated
+    # once and refilled in place from the ring.
+    chunks_per_window = -(-int(buffer_duration * sample_rate) // chunk_size)
+    window_bytes = chunks_per_window * chunk_bytes
+    audio_buffer = bytearray(window_bytes)
+    audio_buffer_view = memoryview(audio_buffer)
+    audio_for_vad = np.frombuffer(audio_buffer, dtype=np.int16)
+
+    # Float copies of the window (raw, and scaled to [-1, 1] for Silero),
+    # also allocated once and overwritten in place.
+    samples = np.empty(audio_for_vad.shape, dtype=np.float32)
+    scaled = np.empty_like(samples)
+    inv_n_samples = 1.0 / samples.size
+
+    # Frames after speech started, written by offset into one buffer
+    # sized for the longest allowed recording (plus one spare window).
+    recorded = bytearray(int(max_recording_duration * sample_rate) * 2 + window_bytes)
+    recorded_view = memoryview(recorded)
+    recorded_bytes = 0
+
+    def save_buffer() -> bool:
+        """
+        Copy the current window into `recorded`. Returns False if
+        there is no room left (max recording duration reached).
+        """
+        nonlocal recorded_bytes
+        if recorded_bytes + window_bytes > len(recorded):
+            return False
+        recorded_view[recorded_bytes:recorded_bytes + window_bytes] = audio_buffer_view
+        recorded_bytes += window_bytes
+        return True
 
     recording_started = False
     last_speech_time = None
     recording_start_time = None
 
+    # Local bindings for the per-window loop.
+    read_into = ring.read_into
+    cancel = _cancel_recording
+    clock = time.time
+    rms_floor = SILENCE_RMS_FLOOR
+
+    # Start the shared audio stream.
+    _start_input_stream()
+    start_time = clock()
+
     try:
         while True:
-            if not recording_started and (time.time() - start_time) > max_no_speech_duration:
+            if cancel.is_set():
+                logging.info("Recording cancelled by a newer request.")
+                break
+
+            now = clock()
+            if not recording_started and (now - start_time) > max_no_speech_duration:
                 logging.info(f"No speech detected within {max_no_speech_duration}s, stopping.")
                 break
 
-            # Read from the audio stream, appending to the buffer too.
-            data = stream.read(chunk_size, exception_on_overflow=False)
-            audio_np = np.frombuffer(data, dtype=np.int16)
-            audio_buffer.append(audio_np)
+            # Fill the next VAD window with audio captured by the callback.
+            if not read_into(audio_buffer_view, timeout=1.0, cancel=cancel):
+                if cancel.is_set():
+                    continue
+
+                # A stopped stream will never deliver again; fail the
+                # request like a blocking read error would.
+                if not _input_stream.is_active():  # type: ignore
+                    raise RuntimeError("Input stream stopped delivering audio.")
+
+                logging.warning("No audio from input stream within 1s.")
+
+                # The no-speech check above only covers the time before
+                # speech; once recording, a stalled stream must not keep
+                # the request alive past the max duration.
+                if recording_started and \
+                    clock() - recording_start_time >= max_recording_duration:  # type: ignore
+                    logging.info(f"Max recording duration {max_recording_duration}s\
+                                  reached while waiting for audio, stopping.")
+                    break
+                continue
 
-            # Run VAD once we have enough audio buffered.
-            total_samples = sum(len(chunk) for chunk in audio_buffer)
+            # Cheap energy gate: most windows before the caller speaks are
+            # near-silent, and those don't need the neural VAD at all.
+            np.copyto(samples, audio_for_vad)
+            rms = np.sqrt(np.dot(samples, samples) * inv_n_samples)
 
-            if total_samples < int(buffer_duration * sample_rate):
-                continue
+            if rms < rms_floor:
+                speech_duration = 0.0
 
-            audio_for_vad = np.concatenate(audio_buffer)
-            audio_tensor = torch.from_numpy(audio_for_vad).float() / 32768.0
+            else:
+                np.multiply(samples, 1.0 / 32768.0, out=scaled)
+                audio_tensor = torch.from_numpy(scaled)
 
-            speech_timestamps = get_speech_timestamps(
-                audio_tensor,
-                silero_model,
-                sampling_rate=sample_rate,
-                return_seconds=True)
+                speech_timestamps = get_speech_timestamps(
+                    audio_tensor,
+                    silero_model,
+                    sampling_rate=sample_rate,
+                    return_seconds=True)
 
-            # Assuming a buffer of 1 sec, if greater than 0.3 is speech, it's real
-            speech_duration = sum(ts['end'] - ts['start'] for ts in speech_timestamps)
+                # Assuming a buffer of 1 sec, if greater than 0.3 is speech, it's real
+                speech_duration = sum(ts['end'] - ts['start'] for ts in speech_timestamps)
 
-            if speech_duration > 0.5:
-                last_speech_time = time.time()
+            if recording_started:
+                speech_threshold = SPEECH_CONTINUE_THRESHOLD
+            else:
+                speech_threshold = SPEECH_START_THRESHOLD
+
+            # Speech/silence timing is measured once the window is filled.
+            now = clock()
+
+            if speech_duration > speech_threshold:
+                last_speech_time = now
                 if not recording_started:
                     recording_started = True
-                    recording_start_time = time.time()
+                    recording_start_time = now
 
-                recorded_frames.extend(audio_buffer)
-                audio_buffer = []
+                if not save_buffer():
+                    logging.info(f"Max recording duration {max_recording_duration}s\
+                                  reached, stopping.")
+                    break
 
             else:
                 if recording_started:
-                    silence_elapsed = time.time() - last_speech_time  # type: ignore
-                    recording_elapsed = time.time() - recording_start_time # type: ignore
+                    silence_elapsed = now - last_speech_time  # type: ignore
+                    recording_elapsed = now - recording_start_time # type: ignore
 
                     # Check max recording duration (added)
                     if recording_elapsed >= max_recording_duration:
@@ -145,31 +431,32 @@ def record_audio_with_silero_vad(
                         logging.info(f"Silence for {silence_elapsed:.2f}s \
                                      after speech and minimum recording time reached, stopping.")
                         break
-                    else:
-                        recorded_frames.extend(audio_buffer)
-                        audio_buffer = []
+                    elif not save_buffer():
+                        logging.info(f"Max recording duration {max_recording_duration}s\
+                                      reached, stopping.")
+                        break
 
                 else:
-                    # Not recording yet, limit buffer to prevent memory bloat
-                    # max_buffer_samples = int(buffer_duration * sample_rate * 5)
-                    # if sum(len(c) for c in audio_buffer) > max_buffer_samples:
-                    #     audio_buffer.pop(0)
-                    audio_buffer.clear()
+                    # Not recording yet: the window is simply refilled
+                    # (overwritten) on the next pass.
                     # Optionally sleep a tiny bit to avoid busy loop
                     time.sleep(0.01)
 
     finally:
         try:
-            stream.stop_stream()
-            stream.close()
+            _stop_input_stream()
         except Exception as e:
             logging.warning(f"Stream close error: {e}")
 
-        if not recorded_frames:
+        if ring.overflows:
+            logging.warning(f"Dropped {ring.overflows} audio blocks (VAD fell behind).")
+
+        if not recorded_bytes:
             logging.info("No speech was detected. Returning None.")
             return None
 
-    recorded_audio = np.concatenate(recorded_frames)
+    # Zero-copy view over the filled part of the buffer.
+    recorded_audio = np.frombuffer(recorded_view[:recorded_bytes], dtype=np.int16)
 
     return recorded_audio
 
@@ -177,12 +464,12 @@ def record_audio_with_silero_vad(
 class AudioRecordingAPI(Resource):
     """
     API Resource to trigger audio recording using Silero
-    VAD and return audio as base64.
+    VAD and return the audio as a WAV file.
     """
 
     def post(self):
         """
-        Handle POST request to start audio recording and return audio as base64.
+        Handle POST request to start audio recording and return the audio.
 
         Expected JSON body:
         {
@@ -193,10 +480,11 @@ class AudioRecordingAPI(Resource):
 
         Returns:
         -------
+        audio/wav:
+            The recorded audio (mono, 16-bit PCM), if speech was recorded.
         JSON:
-            - status: "success" or "error"
-            - audio: Base64-encoded audio data (if successful)
-            - message: Error message (if any failure occurs)
+            - status: "failure" or "error"
+            - message: Why there is no audio
         """
         try:
             # Parse incoming JSON request.
@@ -219,13 +507,9 @@ class AudioRecordingAPI(Resource):
                     "message": "No speech detected."
                 }, 200
 
-            # Convert the audio to base64.
-            audio_b64 = encode_audio_to_base64(audio_data)
-
-            return jsonify({
-                "status": "success",
-                "audio": audio_b64
-            })
+            # Send the audio back as a raw WAV body: no base64 inflation
+            # and no JSON string to build around it.
+            return Response(encode_audio_to_wav(audio_data), mimetype="audio/wav")
 
         except ValueError as ve:
             logger.error(f"ValueError:")
@@ -258,6 +542,3 @@ if __name__ == "__main__":
         port=8010,
         debug=False,
         use_reloader=False)
-
-    import atexit
-    atexit.register(pa.terminate)
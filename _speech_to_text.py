@@ -100,19 +100,23 @@ class SpeechToTextAPI(Resource):
     """
     RESTful API resource for Speech to Text (ASR) conversion.
 
-    Exposes a POST endpoint at `/asr` that accepts JSON input containing audio
-    and ASR parameters, and returns the recognized text.
-
-    Expected JSON input fields:
-        - audio (str): Base64-encoded audio data (WAV format, mono, 16-bit PCM).
-        - model (str): ASR model to use (currently supports "vosk").
+    Exposes a POST endpoint at `/asr` that accepts audio and ASR parameters,
+    and returns the recognized text.
+
+    Expected input, either:
+        - A raw `audio/wav` body (mono, 16-bit PCM), with the ASR model
+          (currently supports "vosk") in the `model` query parameter.
+        - JSON with fields:
+            - audio (str): Base64-encoded audio data (WAV format, mono, 16-bit PCM).
+            - model (str): ASR model to use (currently supports "vosk").
     """
 
     def post(self):
         """
         Handle POST request to transcribe audio to text.
 
-        Expected JSON body:
+        Expected body: raw WAV bytes with `Content-Type: audio/wav` and
+        `?model=vosk`, or JSON:
         {
             "audio": "base64-encoded-audio",
             "model": "vosk"
@@ -126,17 +130,24 @@ class SpeechToTextAPI(Resource):
             - message: Error message (if any failure occurs)
         """
         try:
-            # Parse incoming JSON request.
-            data = request.get_json()
+            if request.mimetype == "audio/wav":
+                # The body is the WAV file itself.
+                audio_bytes = request.get_data()
+                model_name = request.args["model"]
 
-            # Base64-encoded audio data.
-            audio_b64 = data["audio"]
-            
-            # Normalize model name.
-            model_name = data["model"].strip().lower()
+            else:
+                # Parse incoming JSON request.
+                data = request.get_json()
+
+                # Base64-encoded audio data.
+                audio_b64 = data["audio"]
+                model_name = data["model"]
 
-            # Decode the base64-encoded audio into raw bytes.
-            audio_bytes = base64.b64decode(audio_b64)
+                # Decode the base64-encoded audio into raw bytes.
+                audio_bytes = base64.b64decode(audio_b64)
+
+            # Normalize model name.
+            model_name = model_name.strip().lower()
 
             # Extract PCM audio data from the WAV file.
             with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
@@ -3,11 +3,11 @@ from flask_restful import Api, Resource
 from gtts import gTTS
 import logging
 import os
-import platform
 import pyttsx3
 import re
 import requests
 import subprocess
+import sys
 from typing import Optional
 import yaml
 from utils import HealthCheckAPI
@@ -36,6 +36,11 @@ with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
 
+# Picks the command-line TTS tool below.
+_IS_DARWIN = sys.platform == "darwin"
+_IS_LINUX = sys.platform.startswith("linux")
+
+
 def clean_text_for_tts(text : str) -> str:
     """
     Remove characters unwanted for TTS.
@@ -103,7 +108,7 @@ def command_line_say(
         The `output_audio_path`
     """
     # MacOS.
-    if platform.system() == "Darwin":
+    if _IS_DARWIN:
         filename_aiff = "temp.aiff"
 
         # Use macOS TTS to generate AIFF.
@@ -117,7 +122,7 @@ def command_line_say(
         os.remove(filename_aiff)    
 
     # Linux / Pi.
-    elif platform.system() == "Linux":
+    elif _IS_LINUX:
         # Use pyttsx3 to save speech to file.
         # NOTE: can use "espeak" instead.
         engine = pyttsx3.init()
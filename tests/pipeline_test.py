@@ -37,7 +37,7 @@ asr_runner = KillableFunctionRunner(
 
 try:
     transcription = asr_runner.start(
-        audio_b64=audio,
+        audio=audio,
         model="vosk",
         asr_server_url="http://localhost:8011/asr")
 
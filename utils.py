@@ -1,13 +1,18 @@
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify, Response
 from flask_restful import Resource
+import functools
 import io
 import logging
 import numpy as np
 import os
 import random
+import re
 import requests
+from requests.adapters import HTTPAdapter
 from sentence_transformers import SentenceTransformer
+import struct
 import subprocess
 from typing import Optional
 import wave
@@ -20,14 +25,59 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-# Read all the banned words into a list.
-BANNED_WORDS: Optional[list[str]] = None
+# Read all the banned words into a set, lowercased once here since
+# matching ignores case. Blank lines are skipped (an empty word would
+# match every input).
+BANNED_WORDS: Optional[frozenset[str]] = None
 try:
     with open("banned_words.txt", "r") as f:
-        BANNED_WORDS = [line.rstrip('\n') for line in f]
+        BANNED_WORDS = frozenset(word.strip().lower() for word in f if word.strip())
 except FileNotFoundError:
     logging.warning("WARNING: no './banned_words.txt' file - please create one!")
 
+# Match all banned words in a single pass instead of one scan per word.
+# Prefer an Aho-Corasick automaton (optional `pyahocorasick` package);
+# otherwise fall back to one case-insensitive alternation regex.
+_BANNED_AUTOMATON = None
+_BANNED_RE: Optional[re.Pattern] = None
+if BANNED_WORDS:
+    try:
+        import ahocorasick  # type: ignore
+        _BANNED_AUTOMATON = ahocorasick.Automaton()
+        for word in BANNED_WORDS:
+            _BANNED_AUTOMATON.add_word(word, word)
+        _BANNED_AUTOMATON.make_automaton()
+    except ImportError:
+        _BANNED_RE = re.compile("|".join(re.escape(word) for word in sorted(BANNED_WORDS)),
+                                re.IGNORECASE)
+
+# Whole inputs that are just a greeting.
+_GREETINGS = frozenset({"huh", "hi", "hello", "sup",
+                        "what's up", "greetings", "hi there",
+                        "hello there"})
+
+# Whole inputs that are just a filler word.
+_FILLER_WORDS = frozenset({"", " ", "huh", "what", "um"})
+
+# Whole inputs that are ignored: both of the above, so one lookup does.
+_IGNORED_INPUTS = _GREETINGS | _FILLER_WORDS
+
+# Anything longer than this can't be a whole greeting or filler word.
+_MAX_IGNORED_LEN = max(len(phrase) for phrase in _IGNORED_INPUTS)
+
+
+# Keep the printer connection alive between prints.
+_PRINTER_SESSION = requests.Session()
+_PRINTER_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+# Prints are sent in the background so callers never wait on the printer.
+_PRINTER_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+# Dedicated RNG for picking prompt files (seeded from os.urandom); can be
+# re-seeded for reproducible runs without touching the global `random`.
+_rng = random.Random()
+
 
 # Load the model once at module level for efficiency
 _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
@@ -52,19 +102,31 @@ def ignored_phrases(text : str) -> bool:
     if not BANNED_WORDS:
         return False
 
-    # Check whether the entire input is bad, like a greeting.
-    if text.lower() in ("huh", "hi", "hello", "sup",
-                        "what's up", "greetings", "hi there",
-                        "hello there"):
+    # Nothing was said.
+    if not text:
         return True
 
-    # Check whether the input is a filler word.
-    if (not text) or text.lower() in ("", " ", "huh", "what", "um"):
-        return True
+    # Only short inputs can be a whole greeting or filler word, so only
+    # those get lowercased up front.
+    lowered = None
+    if len(text) <= _MAX_IGNORED_LEN:
+        lowered = text.lower()
+
+        # Check whether the entire input is bad, like a greeting or a
+        # filler word.
+        if lowered in _IGNORED_INPUTS:
+            return True
 
     # Check if there are banned words in the input.
-    if BANNED_WORDS:
-        if any(word in text.lower() for word in BANNED_WORDS):
+    if _BANNED_AUTOMATON is not None:
+        # The automaton is case-sensitive and holds lowercased words.
+        if lowered is None:
+            lowered = text.lower()
+        if next(_BANNED_AUTOMATON.iter(lowered), None) is not None:
+            return True
+
+    elif _BANNED_RE is not None:
+        if _BANNED_RE.search(text):
             return True
 
     return False
@@ -76,6 +138,9 @@ def print_text(
     """
     Sends some text to a thermal printer to be printed out.
 
+    NOTE: returns immediately; the request is sent on a background thread
+    and failures are only logged.
+
     Parameters
     ----------
     text : str
@@ -90,10 +155,23 @@ def print_text(
     """
     data = {"text": text}
 
-    response = requests.post(
-        printer_api,
-        json=data,
-        timeout=(1.0, 10.0)) # (connect_timeout, read_timeout)
+    _PRINTER_EXECUTOR.submit(_post_to_printer, printer_api, data)
+
+
+def _post_to_printer(
+    printer_api : str,
+    data : dict) -> None:
+    """
+    Worker for `print_text`: posts to the printer over the shared session.
+    """
+    try:
+        _PRINTER_SESSION.post(
+            printer_api,
+            json=data,
+            timeout=(1.0, 10.0)) # (connect_timeout, read_timeout)
+
+    except requests.RequestException as e:
+        logging.warning(f"Failed to contact printer: {e}")
 
 
 def create_embedding(text : str) -> np.ndarray:
@@ -115,6 +193,43 @@ def create_embedding(text : str) -> np.ndarray:
     return embedding  # type: ignore
 
 
+def _wav_header(
+    n_bytes : int,
+    sample_rate : int) -> bytes:
+    """
+    Builds the 44-byte RIFF header for `n_bytes` of mono 16-bit PCM.
+    """
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + n_bytes, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", n_bytes)
+
+
+def encode_audio_to_wav(
+    audio : np.ndarray,
+    sample_rate : int = 16000) -> bytes:
+    """
+    Encodes the recorded audio as WAV file bytes.
+
+    Parameters:
+    ----------
+    audio : np.ndarray
+        The recorded audio data (int16).
+    sample_rate : int
+        The sampling rate (default 16000 Hz).
+
+    Returns:
+    -------
+    bytes
+        The WAV file (mono, 16-bit PCM).
+    """
+    # Prepend a hand-built header rather than round-tripping through `wave`.
+    pcm = memoryview(np.ascontiguousarray(audio)).cast("B")
+
+    return _wav_header(len(pcm), sample_rate) + pcm
+
+
 def encode_audio_to_base64(
     audio : np.ndarray,
     sample_rate : int = 16000) -> str:
@@ -133,17 +248,11 @@ def encode_audio_to_base64(
     str
         Base64-encoded audio string.
     """
-    # Convert numpy array to WAV format.
-    with io.BytesIO() as audio_io:
-        with wave.open(audio_io, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)  # 16-bit PCM
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio.tobytes())
+    wav_bytes = encode_audio_to_wav(audio, sample_rate)
 
-        audio_b64 = base64.b64encode(audio_io.getvalue()).decode('utf-8')
+    audio_b64 = base64.b64encode(wav_bytes).decode('utf-8')
 
-        return audio_b64
+    return audio_b64
 
 
 class HealthCheckAPI(Resource):
@@ -174,6 +283,18 @@ def decode_base64_wav_to_np(audio_b64 : str) -> np.ndarray:
     return audio_np
 
 
+@functools.lru_cache(maxsize=8)
+def _list_files(folder_path : str) -> tuple[str, ...]:
+    """
+    Full paths of the files in `folder_path`.
+
+    Cached: the prompt folders are static while the program runs.
+    """
+    # `scandir` entries carry their path and file type, so no extra stat.
+    with os.scandir(folder_path) as entries:
+        return tuple(entry.path for entry in entries if entry.is_file())
+
+
 def get_random_file(folder_path : str) -> str:
     """
     Returns a randomly selected file path from the given folder.
@@ -188,7 +309,12 @@ def get_random_file(folder_path : str) -> str:
     str
         Full path to a randomly selected file.
     """
-    files = [f for f in os.listdir(folder_path) if \
-             os.path.isfile(os.path.join(folder_path, f))]
+    return _rng.choice(_list_files(folder_path))
 
-    return os.path.join(folder_path, random.choice(files))
+
+def clear_file_cache() -> None:
+    """
+    Forgets the cached folder listings used by `get_random_file`, so
+    files added to (or removed from) a prompt folder are picked up.
+    """
+    _list_files.cache_clear()
@@ -1,10 +1,19 @@
 import logging
 import multiprocessing
+from multiprocessing.connection import Connection, wait
 import requests
-import time
+from requests.adapters import HTTPAdapter
+import threading
 from typing import Any, Callable, Optional
 import yaml
-from utils_gpio import phone_picked_up
+from utils_gpio import phone_picked_up, add_hangup_callback, \
+    remove_hangup_callback
+
+# Optional faster JSON (de)serialization.
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
 
 
 
@@ -20,11 +29,85 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Shared HTTP session so every stage reuses kept-alive connections to the
+# VAD/ASR/response/TTS servers instead of reconnecting per request.
+_API_SESSION = requests.Session()
+_API_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_API_SESSION.mount("http://", _API_ADAPTER)
+_API_SESSION.mount("https://", _API_ADAPTER)
+
+# With the hangup edge, a thread-mode runner still re-checks its killer
+# this often, in case an edge is missed or a callback before it failed.
+_EDGE_FALLBACK_INTERVAL = 0.5
+
+
+def _post(
+    url : str,
+    payload : dict,
+    timeout : float) -> requests.Response:
+    """
+    POSTs `payload` as JSON over the shared session. Uses `orjson` for
+    the encoding when installed.
+
+    Raises
+    ------
+    requests.RequestException
+        On connection errors or HTTP error statuses.
+    """
+    if orjson is None:
+        response = _API_SESSION.post(url, json=payload, timeout=timeout)
+    else:
+        response = _API_SESSION.post(
+            url,
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout)
+
+    response.raise_for_status()
+    return response
+
+
+def _parse_json(response : requests.Response) -> dict:
+    """
+    Parses a JSON reply, with `orjson` when installed.
+
+    Raises
+    ------
+    ValueError
+        If the reply isn't valid JSON.
+    """
+    if orjson is None:
+        return response.json()
+
+    return orjson.loads(response.content)
+
+
+def _post_json(
+    url : str,
+    payload : dict,
+    timeout : float) -> dict:
+    """
+    POSTs `payload` as JSON over the shared session and returns the parsed
+    JSON reply.
+    """
+    return _parse_json(_post(url, payload, timeout))
+
+
 class KillableFunctionRunner:
     """
-    A class to run any function in a separate process that is
-    monitored by a "killer" function. If the killer returns False,
-    the process is terminated.
+    A class to run any function in a separate, long-lived worker process
+    that is monitored by a "killer" function. If the killer returns False,
+    the worker is terminated (and restarted on the next call).
+
+    The worker is started once and then reused: each call to `start`
+    just hands it a new set of arguments over a pipe, instead of
+    spawning a fresh process (and Manager server) per call.
+
+    With `use_thread=True` the function runs in a daemon thread instead,
+    which suits IO-bound functions (like the HTTP calls below) that
+    release the GIL. A thread can't be killed: when the killer fires,
+    `start` returns None right away and the thread is left to finish
+    in the background, its result discarded.
 
     Example usage:
         runner = KillableFunctionRunner(func=text_to_speech_api, 
@@ -34,9 +117,10 @@ class KillableFunctionRunner:
 
     def __init__(
         self,
-        func : Callable[..., Optional[str]],
+        func : Callable[..., Optional[Any]],
         killer : Callable[[], bool],
-        check_interval : float = 0.1) -> None:
+        check_interval : float = 0.1,
+        use_thread : bool = False) -> None:
         """
         Initialize the runner.
 
@@ -48,6 +132,8 @@ class KillableFunctionRunner:
             A function that returns False when the process should be killed.
         check_interval : float
             Time interval (in seconds) to check the killer function.
+        use_thread : bool
+            Run the function in a thread rather than a worker process.
         """
         # Function to run in the child process.
         self.func = func
@@ -58,35 +144,47 @@ class KillableFunctionRunner:
         # Frequency to check the killer.
         self.check_interval = check_interval
 
-        # Will hold the process.
+        # Whether calls run in a thread instead of the worker process.
+        self.use_thread = use_thread
+
+        # Will hold the worker process.
         self._process: Optional[multiprocessing.Process] = None
 
-        # Queue for receiving result from the process.
-        self._queue: Optional[multiprocessing.Queue] = None
+        # One-way pipes for sending jobs to / receiving results from the
+        # worker. Plain pipes: no proxy server or queue feeder thread.
+        self._jobs: Optional[Connection] = None
+        self._results: Optional[Connection] = None
 
 
-    def _target(
-        self, 
-        queue : multiprocessing.Queue, kwargs: dict):
-        try:
-            # Execute the function with passed arguments.
-            result = self.func(**kwargs)
+    def _ensure_worker(self) -> None:
+        """
+        Start the worker process if it isn't already running.
+        """
+        if self._process is not None and self._process.is_alive():
+            return
 
-            # Send result back to parent process.
-            queue.put(result)
+        # Fresh pipes: a terminated worker may have left them mid-message.
+        jobs_reader, self._jobs = multiprocessing.Pipe(duplex=False)
+        self._results, results_writer = multiprocessing.Pipe(duplex=False)
 
-        except Exception as e:
-            # Send exception back if something goes wrong.
-            logger.warning("[Child] Exception occurred:")
-            logger.warning(e)
-            queue.put(e)
+        self._process = multiprocessing.Process(
+            target=_worker_loop,
+            args=(self.func, jobs_reader, results_writer),
+            daemon=True)
+
+        # Start the child process.
+        self._process.start()
+
+        # The child holds its own copies of these ends.
+        jobs_reader.close()
+        results_writer.close()
 
 
     def start(
         self, 
-        **kwargs: Any) -> Optional[str]:
+        **kwargs: Any) -> Optional[Any]:
         """
-        Start the process and monitor with killer function.
+        Run the function in the worker and monitor with killer function.
 
         Parameters
         ----------
@@ -95,24 +193,20 @@ class KillableFunctionRunner:
 
         Returns
         -------
-        Optional[str]
+        Optional[Any]
             The function's return value or None if killed.
         """
-        # Create a queue for communication.
-        manager = multiprocessing.Manager()
-        self._queue = manager.Queue()  # type: ignore
+        if self.use_thread:
+            return self._start_in_thread(kwargs)
 
-        self._process = multiprocessing.Process(
-            target=self._target,
-            # Launch the function with arguments.
-            args=(self._queue, kwargs))
+        try:
+            self._ensure_worker()
 
-        # Start the child process.
-        self._process.start()
+            # Hand the job to the worker.
+            self._jobs.send(kwargs)  # type: ignore
 
-        try:
-            # Monitor the killer condition in a loop.
-            while self._process.is_alive():
+            # Monitor the killer condition while waiting for the result.
+            while True:
 
                 # If killer returns False, kill the process.
                 if not self.killer():
@@ -120,57 +214,152 @@ class KillableFunctionRunner:
                     # Indicate it was stopped prematurely.
                     return None
 
-                # Wait before checking again.
-                time.sleep(self.check_interval)
+                # Block (up to one check interval) until the result
+                # arrives or the worker dies, whichever comes first.
+                ready = wait(
+                    [self._results, self._process.sentinel],  # type: ignore
+                    timeout=self.check_interval)
 
-            # Wait for process to finish gracefully.
-            self._process.join()
+                if self._results in ready:
+                    result = self._results.recv()  # type: ignore
+                    break
 
-            # Try to retrieve the result (or exception) from the queue.
-            if not self._queue.empty():  # type: ignore
-                result = self._queue.get()  # type: ignore
-                if isinstance(result, Exception):
-                    # Reraise any exception from the process.
-                    raise result
-                # Return the successful result.
-                return result
-            else:
-                logger.warning("[Parent] Queue is empty after process \
-                               joined. No result received.")
-
-            # No result available.
-            return None
+                if ready:
+                    logger.warning("[Parent] Worker exited. No result received.")
+                    self.stop()
+                    return None
 
         # Make sure to clean up.
         except Exception as e:
             self.stop()
             raise e
 
+        if isinstance(result, Exception):
+            # Reraise any exception from the worker.
+            raise result
+
+        # Return the successful result.
+        return result
+
+
+    def _start_in_thread(
+        self,
+        kwargs : dict) -> Optional[Any]:
+        """
+        `start` for `use_thread=True`: runs the function in a fresh daemon
+        thread and sleeps until it finishes or the phone is put down.
+        """
+        # Per-call state, so a thread abandoned by an earlier kill can't
+        # hand its late result to a later call.
+        wake = threading.Event()
+        outcome: list = []
+
+        def target() -> None:
+            try:
+                outcome.append(self.func(**kwargs))
+            except Exception as e:
+                logger.warning("[Thread] Exception occurred:")
+                logger.warning(e)
+                outcome.append(e)
+            finally:
+                wake.set()
+
+        # On the Pi, the button's release edge wakes the wait directly, so
+        # the killer is re-checked when something happened, plus a coarse
+        # fallback poll. Elsewhere it is polled every check interval.
+        edge_triggered = add_hangup_callback(wake.set)
+        timeout = (max(self.check_interval, _EDGE_FALLBACK_INTERVAL)
+                   if edge_triggered else self.check_interval)
+
+        threading.Thread(target=target, daemon=True).start()
+
+        try:
+            while True:
+                # If killer returns False, stop waiting on the thread.
+                if not self.killer():
+                    return None
+
+                if outcome:
+                    break
+
+                wake.wait(timeout=timeout)
+                # Cleared before the next checks, so a wakeup that arrives
+                # after them is never lost.
+                wake.clear()
+
+        finally:
+            if edge_triggered:
+                remove_hangup_callback(wake.set)
+
+        result = outcome[0]
+
+        if isinstance(result, Exception):
+            # Reraise any exception from the thread.
+            raise result
+
+        return result
+
 
     def stop(self):
         """
-        Terminate the process if running.
+        Terminate the worker process if running.
         """
         if self._process and self._process.is_alive():
-            # Force kill the process.
+            # Force kill the process (it may be mid-request).
             self._process.terminate()
 
             # Wait until it's finished.
             self._process.join()
 
-        # Reset process and queue for safety.
+        # Reset process and pipes; a new worker is started on demand.
+        if self._jobs is not None:
+            self._jobs.close()
+        if self._results is not None:
+            self._results.close()
         self._process = None
-        self._queue = None
+        self._jobs = None
+        self._results = None
+
+
+def _worker_loop(
+    func : Callable[..., Optional[Any]],
+    jobs : Connection,
+    results : Connection) -> None:
+    """
+    Body of a `KillableFunctionRunner` worker: runs `func` on each job's
+    keyword arguments and sends back the result (or exception).
+    A `None` job (or the parent closing the pipe) shuts the worker down.
+    """
+    while True:
+        try:
+            kwargs = jobs.recv()
+        except EOFError:
+            break
+        if kwargs is None:
+            break
+
+        try:
+            # Execute the function with passed arguments.
+            result = func(**kwargs)
+
+            # Send result back to parent process.
+            results.send(result)
+
+        except Exception as e:
+            # Send exception back if something goes wrong.
+            logger.warning("[Child] Exception occurred:")
+            logger.warning(e)
+            results.send(e)
 
 
 def record_audio_api(
     silence_duration_to_stop : float,
     min_recording_duration : float,
     max_recording_duration : float,
-    recording_api_url : str) -> Optional[str]:
+    recording_api_url : str) -> Optional[bytes]:
     """
     Sends a request to the AudioRecordingAPI to start recording audio
-    and returns the base64-encoded audio.
+    and returns the recorded WAV file.
 
     Parameters
     ----------
@@ -185,8 +374,8 @@ def record_audio_api(
 
     Returns
     -------
-    str
-        The base64-encoded audio if successful.
+    bytes
+        The WAV file bytes if successful.
     None
         On failure or if no audio is detected.
     """
@@ -200,25 +389,16 @@ def record_audio_api(
         timeout = max_recording_duration + 1 + 2
 
         # Send the POST request to the API.
-        response = requests.post(
-            recording_api_url,
-            json=payload,
-            timeout=timeout)
-        
-        # Raise an error for any failed responses
-        response.raise_for_status()
-
-        # Parse the JSON response
-        result = response.json()
+        response = _post(recording_api_url, payload, timeout)
 
-        # Check if the response was successful
-        if result.get("status") == "success":
-            # Return the base64-encoded audio
-            return result.get("audio")
+        # Recorded audio comes back as the raw WAV body.
+        if response.headers.get("Content-Type", "").startswith("audio/"):
+            return response.content
 
-        else:
-            pass
-            # raise RuntimeError(f"Error from API: {result.get('message')}")
+        # Otherwise it's a JSON status without audio (e.g. no speech).
+        result = _parse_json(response)
+        logger.info(f"No audio from recording API: {result.get('message')}")
+        # raise RuntimeError(f"Error from API: {result.get('message')}")
 
     except requests.RequestException as e:
         # Handle any connection or request exceptions
@@ -230,7 +410,7 @@ def record_audio_api(
 
 
 def speech_to_text_api(
-    audio_b64 : str,
+    audio : bytes,
     model : str,
     asr_server_url : str) -> Optional[str]:
     """
@@ -238,8 +418,8 @@ def speech_to_text_api(
 
     Parameters
     ----------
-    audio_b64 : str
-        Base64-encoded WAV audio string.
+    audio : bytes
+        WAV file bytes (mono, 16-bit PCM), as returned by `record_audio_api`.
     model : str
         The ASR model to use (e.g., "vosk").
     asr_server_url : str
@@ -252,16 +432,17 @@ def speech_to_text_api(
     None
         On failure or if no speech is detected.
     """
-    # Prepare the payload for the request
-    payload = {
-        "audio": audio_b64,
-        "model": model}
-
     try:
-        # Make the POST request to the ASR API
-        response = requests.post(asr_server_url, json=payload, timeout=10)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        result = response.json()
+        # Make the POST request to the ASR API, with the WAV file as the
+        # raw body (no base64) and the model in the query string.
+        response = _API_SESSION.post(
+            asr_server_url,
+            data=audio,
+            params={"model": model},
+            headers={"Content-Type": "audio/wav"},
+            timeout=10)
+        response.raise_for_status()
+        result = _parse_json(response)
 
         # Check if the transcription was successful
         if result.get("status") == "success":
@@ -307,17 +488,8 @@ def response_api(
         "system_prompt": system_prompt}
 
     try:
-        # Send the POST request to the API
-        response = requests.post(
-            response_api_url,
-            json=payload,
-            timeout=10)
-        
-        # Raise an error for any failed responses
-        response.raise_for_status()
-
-        # Parse the JSON response
-        result = response.json()
+        # Send the POST request to the API and parse the JSON response.
+        result = _post_json(response_api_url, payload, timeout=10)
 
         # Check if the response was successful
         if result.get("status") == "success":
@@ -370,12 +542,7 @@ def text_to_speech_api(
         "language": language}
 
     try:
-        response = requests.post(
-            tts_server_url,
-            json=payload,
-            timeout=10)
-        response.raise_for_status()
-        result = response.json()
+        result = _post_json(tts_server_url, payload, timeout=10)
 
         if result.get("status") == "success":
             return result.get("audio_path")
@@ -387,24 +554,62 @@ def text_to_speech_api(
 
 
 
-# Load config file.
+# Load config file (with libyaml's C loader when PyYAML was built with it).
 with open("config.yaml", "r") as f:
-    CONFIG = yaml.safe_load(f)
+    CONFIG = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+# Per-stage settings, read from the config once instead of on every turn.
+_VAD_KWARGS = {
+    "silence_duration_to_stop": CONFIG["silence_duration_to_stop"],
+    "min_recording_duration": CONFIG["min_recording_duration"],
+    "max_recording_duration": CONFIG["max_recording_duration"],
+    "recording_api_url": CONFIG["vad_api_url"]}
+
+_ASR_KWARGS = {
+    "model": CONFIG["asr_model"],
+    "asr_server_url": CONFIG["asr_api_url"]}
+
+_RESPONSE_KWARGS = {
+    "model": CONFIG["response_model"],
+    "response_api_url": CONFIG["response_api_url"],
+    "system_prompt": CONFIG["system_prompt"]}
+
+_TTS_KWARGS = {
+    "output_audio_path": CONFIG["tts_file_output_path"],
+    "model": CONFIG["text_to_speech_model"],
+    "language": CONFIG["tts_language"],
+    "tts_server_url": CONFIG["tts_api_url"]}
+
+
+# One runner per stage, reused across calls. The stages are just HTTP
+# requests (the work happens in the servers), so they run in threads:
+# no worker processes to fork, and no pickling of arguments or results.
+vad_runner = KillableFunctionRunner(
+    func=record_audio_api,
+    killer=phone_picked_up,
+    use_thread=True)
+
+asr_runner = KillableFunctionRunner(
+    func=speech_to_text_api,
+    killer=phone_picked_up,
+    use_thread=True)
+
+response_runner = KillableFunctionRunner(
+    func=response_api,
+    killer=phone_picked_up,
+    use_thread=True)
+
+tts_runner = KillableFunctionRunner(
+    func=text_to_speech_api,
+    killer=phone_picked_up,
+    use_thread=True)
 
 
 def vad():
     """
     VAD wrapper function.
     """
-    vad_runner = KillableFunctionRunner(
-        func=record_audio_api,
-        killer=phone_picked_up)
-
-    audio = vad_runner.start(
-        silence_duration_to_stop=CONFIG["silence_duration_to_stop"],
-        min_recording_duration=CONFIG["min_recording_duration"],
-        max_recording_duration=CONFIG["max_recording_duration"],
-        recording_api_url=CONFIG["vad_api_url"])
+    audio = vad_runner.start(**_VAD_KWARGS)
     
     return audio
 
@@ -414,14 +619,9 @@ def asr(audio):
     """
     ASR wrapper funtion.
     """
-    asr_runner = KillableFunctionRunner(
-        func=speech_to_text_api,
-        killer=phone_picked_up)
-
     transcription = asr_runner.start(
-        audio_b64=audio,
-        model=CONFIG["asr_model"],
-        asr_server_url=CONFIG["asr_api_url"])
+        audio=audio,
+        **_ASR_KWARGS)
 
     return transcription
 
@@ -430,15 +630,9 @@ def respond(transcription):
     """
     Response wrapper function.
     """
-    response_runner = KillableFunctionRunner(
-        func=response_api,
-        killer=phone_picked_up)
-
     response = response_runner.start(
         text=transcription,
-        model=CONFIG["response_model"],
-        response_api_url=CONFIG["response_api_url"],
-        system_prompt=CONFIG["system_prompt"])
+        **_RESPONSE_KWARGS)
 
     return response
 
@@ -447,16 +641,9 @@ def tts(response):
     """
     TTS wrapper function.
     """
-    tts_runner = KillableFunctionRunner(
-        func=text_to_speech_api,
-        killer=phone_picked_up)
-
     audio_path = tts_runner.start(
         text=response,
-        output_audio_path=CONFIG["tts_file_output_path"],
-        model=CONFIG["text_to_speech_model"],
-        language=CONFIG["tts_language"],
-        tts_server_url=CONFIG["tts_api_url"])
+        **_TTS_KWARGS)
 
     return audio_path
 
@@ -1,76 +1,220 @@
-import platform
-import select
+import logging
+import os
+import re
+import socket
 import sys
+import threading
+from typing import Callable
 
 
 
+# Logging is configured by the app's entrypoint.
+logger = logging.getLogger(__name__)
+
+
+# Host OS flags, shared with the other client modules. The OS can't
+# change at runtime, and `sys.platform` needs no uname() call.
+IS_DARWIN = sys.platform == "darwin"
+IS_LINUX = sys.platform.startswith("linux")
+
 button = None  # default if GPIO is unavailable
 
+# Called (from gpiozero's thread, or the stdin thread on MacOS) when
+# the phone is put down.
+_hangup_callbacks: list[Callable[[], None]] = []
+
+
+def _on_hangup() -> None:
+    # A failing callback must not stop the others (e.g. a runner's
+    # wakeup) or kill the stdin watcher thread that called us.
+    for callback in list(_hangup_callbacks):
+        try:
+            callback()
+        except Exception:
+            logger.exception("Hangup callback %r failed.", callback)
+
+
+def _is_raspberry_pi() -> bool:
+    """
+    Returns True if running on a Raspberry Pi.
+
+    Reads the devicetree model string (~40 bytes, e.g. "Raspberry Pi 4
+    Model B Rev 1.4"), falling back to scanning the CPU info.
+
+    Raises
+    ------
+    FileNotFoundError
+        If neither file exists.
+    """
+    try:
+        with open("/sys/firmware/devicetree/base/model", "rb") as f:
+            return f.read().startswith(b"Raspberry Pi")
+    except FileNotFoundError:
+        pass
+
+    # Case-insensitive search on the raw bytes, without decoding and
+    # lowercasing the whole (multi-KB) file first.
+    with open("/proc/cpuinfo", "rb") as f:
+        return re.search(rb"raspberry pi", f.read(), re.IGNORECASE) is not None
+
+
 # Only attempt GPIO import on Linux
-if platform.system() == "Linux":
+_is_pi = False
+if IS_LINUX:
     try:
-        # Check for Pi by reading the CPU info
-        with open("/proc/cpuinfo") as f:
-            cpuinfo = f.read().lower()
-            if "raspberry pi" in cpuinfo:
-                from gpiozero import Button  # type: ignore
-                button = Button(17, bounce_time=0.05)
-                print("GPIO setup complete.")
-            else:
-                print("Not a Raspberry Pi, skipping GPIO setup.")
+        _is_pi = _is_raspberry_pi()
+        if not _is_pi:
+            logger.debug("Not a Raspberry Pi, skipping GPIO setup.")
     except FileNotFoundError:
-        print("Could not read /proc/cpuinfo, skipping GPIO setup.")
+        logger.warning("Could not read /proc/cpuinfo, skipping GPIO setup.")
 else:
-    print("Not Linux, skipping GPIO setup.")
+    logger.debug("Not Linux, skipping GPIO setup.")
 
+def _pigpiod_running() -> bool:
+    """
+    Returns True if the pigpio daemon accepts connections.
 
-def phone_picked_up(throw_error : bool = True) -> bool:
+    Checked before creating a `PiGPIOFactory`, because `pigpio.pi()`
+    prints a multi-line "Can't connect" banner to stdout when it fails.
     """
-    Returns True if the phone is picked up, otherwise False.
+    host = os.environ.get("PIGPIO_ADDR", "localhost")
+    port = int(os.environ.get("PIGPIO_PORT", 8888))
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
 
-    Imports `button` from RPi's gpiozero library.
 
-    NOTE: when the phone is picked up, the circuit is completed.
-    When the phone is placed down, the circuit disconnects.
+if _is_pi:
+    from gpiozero import Button  # type: ignore
+    # Use the pigpio daemon when it's running: gpiozero turns
+    # `bounce_time` into pigpiod's glitch filter, so debouncing happens in
+    # C and only clean edges reach Python. Otherwise gpiozero's default
+    # pin factory debounces in software.
+    _pin_factory = None
+    if _pigpiod_running():
+        try:
+            from gpiozero.pins.pigpio import PiGPIOFactory  # type: ignore
+            _pin_factory = PiGPIOFactory()
+        except (ImportError, OSError):
+            _pin_factory = None
+    button = Button(17, bounce_time=0.05, pin_factory=_pin_factory)
+    # Property getter bound to the button once, so each poll is a plain
+    # zero-arg call: no descriptor lookup, no global `button` load.
+    _button_is_pressed = type(button).is_pressed.fget.__get__(button)
+    # Edge-triggered: fires on the kernel's GPIO interrupt.
+    button.when_released = _on_hangup
 
-    Returns
-    -------
-    bool
-        True
-            The phone is picked up.
-            NOTE: also always True if testing on MacOS
-        False
-            The phone is placed down.
-    """
-    if platform.system() == "Darwin":
-        # Wait max 0.1 seconds for input
-        i, _, _ = select.select([sys.stdin], [], [], 0.1)
+    logger.info("GPIO setup complete.")
 
-        if i:
-            user_input = sys.stdin.readline().strip()
-            if user_input.lower() == "q":
 
-                if throw_error:
-                    raise PhonePutDownError
-                else:
-                    return False
+# On MacOS, typing "q" (then Enter) stands in for putting the phone down.
+# A daemon thread sits in a blocking read on stdin, so a hangup is
+# delivered like the Pi's button edge instead of being polled for.
+_stdin_hangup = threading.Event()
 
-        return True
 
-    elif platform.system() == "Linux":
-        if button.is_pressed: # type: ignore
-            return True
+def _watch_stdin() -> None:
+    for line in sys.stdin:
+        if line.strip().lower() == "q":
+            _stdin_hangup.set()
+            _on_hangup()
+
+
+if IS_DARWIN:
+    threading.Thread(target=_watch_stdin, daemon=True).start()
+
+# Whether hangups are delivered through `add_hangup_callback`.
+_HAS_HANGUP_EDGE = IS_DARWIN or button is not None
+
 
+def _phone_picked_up_darwin(throw_error : bool = True) -> bool:
+    """
+    `phone_picked_up` on MacOS: typing "q" (then Enter) hangs up.
+    """
+    # Each "q" reads as one hang-up, like a line of input did before.
+    if _stdin_hangup.is_set():
+        _stdin_hangup.clear()
+
+        if throw_error:
+            raise PhonePutDownError
         else:
-            if throw_error:
-                raise PhonePutDownError
-            else:
-                return False
+            return False
 
-    # If it's some other system, return True.
-    else:
+    return True
+
+
+def _phone_picked_up_linux(throw_error : bool = True) -> bool:
+    """
+    `phone_picked_up` on the Pi: reads the GPIO button.
+    """
+    if _button_is_pressed():
         return True
 
+    if throw_error:
+        raise PhonePutDownError
+    else:
+        return False
+
+
+def _phone_picked_up_noop(throw_error : bool = True) -> bool:
+    """
+    `phone_picked_up` on any other system (or Linux without GPIO).
+    """
+    return True
+
+
+# Returns True if the phone is picked up, otherwise False (or raises
+# `PhonePutDownError` if `throw_error`).
+#
+# NOTE: when the phone is picked up, the circuit is completed.
+# When the phone is placed down, the circuit disconnects.
+# NOTE: always True if testing on MacOS, until "q" is entered.
+#
+# The implementation is picked once here, so the 10Hz polling callers
+# don't branch on the platform every call.
+phone_picked_up: Callable[..., bool]
+if IS_DARWIN:
+    phone_picked_up = _phone_picked_up_darwin
+elif button is not None:
+    phone_picked_up = _phone_picked_up_linux
+else:
+    phone_picked_up = _phone_picked_up_noop
+
+
+def add_hangup_callback(callback : Callable[[], None]) -> bool:
+    """
+    Registers `callback` to run as soon as the phone is put down.
+
+    Parameters
+    ----------
+    callback : Callable[[], None]
+        Called from gpiozero's event thread on the button's release edge
+        (or from the stdin thread on MacOS, when "q" is entered).
+
+    Returns
+    -------
+    bool
+        True if the callback was registered. False if hangups can't be
+        detected as events (no GPIO button, and not MacOS), in which
+        case the caller has to fall back to polling `phone_picked_up`.
+    """
+    if not _HAS_HANGUP_EDGE:
+        return False
+
+    _hangup_callbacks.append(callback)
+    return True
+
+
+def remove_hangup_callback(callback : Callable[[], None]) -> None:
+    """
+    Unregisters a callback added with `add_hangup_callback`.
+    Safe to call even if it was never registered.
+    """
+    if callback in _hangup_callbacks:
+        _hangup_callbacks.remove(callback)
+
 
 class PhonePutDownError(Exception):
     """
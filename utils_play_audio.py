@@ -1,21 +1,33 @@
-import platform
+import os
+import shutil
 import subprocess
 import threading
-import time
 from typing import Optional
-from utils_gpio import phone_picked_up, PhonePutDownError
+from utils_gpio import phone_picked_up, PhonePutDownError, \
+    add_hangup_callback, remove_hangup_callback, IS_DARWIN, IS_LINUX
 
 
 
+# Absolute path to ffplay, looked up once. Popen can only use the cheaper
+# `posix_spawn` (instead of fork + exec) when given a path, not a bare
+# program name.
+_FFPLAY = shutil.which("ffplay") or "ffplay"
+
+# One /dev/null descriptor shared by every playback (for ffplay's stdin,
+# stdout and stderr), rather than Popen opening it again per spawn.
+# Non-inheritable itself; Popen dup2()s it onto the child's 0/1/2.
+_DEVNULL_FD = os.open(os.devnull, os.O_RDWR)
+
+
 class play_audio:
     """
     A cross-platform audio playback class with support for delayed
     start, looping, blocking or non-blocking playback, and conditional
     termination based on an external condition (e.g. phone being put down).
 
-    Supports:
-    - macOS (via `afplay`)
-    - Linux (Ubuntu, Raspbian) via `ffplay`
+    Supports (via `ffplay`, which ships with ffmpeg):
+    - macOS
+    - Linux (Ubuntu, Raspbian)
 
     Example usage (non-blocking looped audio with kill-switch):
 
@@ -57,12 +69,14 @@ class play_audio:
         self.blocking = blocking
         self.killable = killable
 
+        # The playback command never changes, so build it once.
+        self._command = self._build_command()
+
         # Active audio subprocess.
         self.process: Optional[subprocess.Popen] = None
-        # (Unused currently).
-        self._kill_thread: Optional[threading.Thread] = None
-        # Used to manually break out of afplay loops (macOS).
-        self._looping = True
+        # Set by `stop`: cuts the start delay short, and keeps a start
+        # that hasn't spawned its process yet from playing afterwards.
+        self._cancel = threading.Event()
 
     def _build_command(self) -> list[str]:
         """
@@ -74,83 +88,74 @@ class play_audio:
         list[str]
             Command list to be passed to subprocess.
         """
-        if platform.system() == "Darwin":
-            # No native loop--handled in Python.
-            return ["afplay", self.filepath]
-
-        elif platform.system() == "Linux":
-            base_cmd = ["ffplay", "-nodisp", "-loglevel", "quiet"]
-            if self.looping:
-                base_cmd += ["-loop", "0"] # Infinite loop.
-            else:
-                base_cmd += ["-autoexit"] # Exit after playing once.
-            return base_cmd + [self.filepath]
-
-        else:
+        if not (IS_DARWIN or IS_LINUX):
             raise RuntimeError("Unsupported OS for audio playback")
 
-    def _monitor_kill_switch(self):
-        """
-        Thread that monitors phone state and stops playback
-        if `phone_picked_up()` returns False.
-
-        (Used only in non-blocking Linux mode.)
-        """
-        while self.process and self.process.poll() is None:
-            if not phone_picked_up():
-                raise PhonePutDownError
-                logging.info("Phone put down — terminating audio.")
-                self.stop()
-                break
-            time.sleep(0.1)
+        # ffplay loops natively, so one process covers the whole playback
+        # on every platform (no re-spawn per loop).
+        base_cmd = [_FFPLAY, "-nodisp", "-loglevel", "quiet"]
+        if self.looping:
+            base_cmd += ["-loop", "0"] # Infinite loop.
+        else:
+            base_cmd += ["-autoexit"] # Exit after playing once.
+        return base_cmd + [self.filepath]
 
     def start(self) -> None:
-        if self.start_delay > 0:
-            time.sleep(self.start_delay)
+        self._cancel.clear()
+
+        def play():
+            # The hangup edge (Pi button, or "q" on MacOS) calls `stop`
+            # directly, which ends the wait below, so playback (blocking
+            # or not) never polls the phone state. Without an edge the
+            # phone can't be put down, so there is nothing to poll for.
+            edge_triggered = self.killable and add_hangup_callback(self.stop)
+
+            try:
+                # Sleep through the start delay, waking early on `stop`.
+                if self.start_delay > 0:
+                    self._cancel.wait(self.start_delay)
+
+                if self.killable and not phone_picked_up(throw_error=False):
+                    # Only a blocking caller can catch this; a background
+                    # thread just doesn't start playing.
+                    if self.blocking:
+                        raise PhonePutDownError
+                    return
+
+                if self._cancel.is_set():
+                    return
+
+                command = self._command
+                # Python opens its own files non-inheritable, so there's
+                # nothing to close in the child; with `close_fds=False`
+                # Popen can use `posix_spawn`.
+                process = subprocess.Popen(
+                    command,
+                    stdin=_DEVNULL_FD,
+                    stdout=_DEVNULL_FD,
+                    stderr=_DEVNULL_FD,
+                    close_fds=False
+                )
+                self.process = process
 
-        self._looping = True
+                # `stop` may have run between the check above and the spawn.
+                if self._cancel.is_set():
+                    process.terminate()
 
-        def play_loop():
-            while self._looping:
-                if self.killable and not phone_picked_up():
-                    raise PhonePutDownError
-                    logging.info("Phone put down — terminating audio.")
-                    self.stop()
-                    break
+                # Ends naturally, or early via `stop`.
+                process.wait()
 
-                command = self._build_command()
-                self.process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
+                if self.blocking and self.killable and not phone_picked_up(throw_error=False):
+                    raise PhonePutDownError
 
-                if self.blocking:
-                    # Poll subprocess and phone state in a tight loop for killability
-                    while True:
-                        if self.process.poll() is not None:
-                            # Playback finished naturally
-                            break
-                        if self.killable and not phone_picked_up():
-                            raise PhonePutDownError
-                            logging.info("Phone put down — terminating audio during playback.")
-                            self.stop()
-                            break
-                        time.sleep(0.1)
-
-                    if not self.looping or not self._looping:
-                        break
-
-                else:
-                    # Non-blocking, just start process and return (kill monitor elsewhere)
-                    self.process.wait()
-                    if not self.looping or not self._looping:
-                        break
+            finally:
+                if edge_triggered:
+                    remove_hangup_callback(self.stop)
 
         if self.blocking:
-            play_loop()
+            play()
         else:
-            thread = threading.Thread(target=play_loop, daemon=True)
+            thread = threading.Thread(target=play, daemon=True)
             thread.start()
 
 
@@ -159,14 +164,17 @@ class play_audio:
         Terminates any active playback process and exits the loop.
         Safe to call even if no playback is active.
         """
-        # Stops loop even on macOS.
-        self._looping = False
+        self._cancel.set()
 
-        if self.process and self.process.poll() is None:
-            self.process.terminate()
-            self.process.wait()
+        # Work on a local copy, so concurrent callers never see the
+        # attribute cleared between the check and the wait.
+        process = self.process
         self.process = None
 
+        if process is not None and process.poll() is None:
+            process.terminate()
+            process.wait()
+
     def is_playing(self) -> bool:
         """
         Returns whether audio is currently playing.
@@ -176,4 +184,5 @@ class play_audio:
         bool
             True if an audio process is running, False otherwise.
         """
-        return (self.process is not None) and (self.process.poll() is None)
+        process = self.process
+        return (process is not None) and (process.poll() is None)